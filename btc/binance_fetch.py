@@ -0,0 +1,269 @@
+import asyncio
+import io
+import os
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import aiohttp
+import numpy as np
+import orjson
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from datetime import datetime, timedelta
+import pytz
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock, run without the cache lock
+    fcntl = None
+
+KLINES_URL = "https://api.binance.com/api/v3/klines"
+ARCHIVE_URL = "https://data.binance.vision/data/spot/monthly/klines/{symbol}/1m/{symbol}-1m-{year}-{month:02d}.zip"
+KLINE_COLUMNS = [
+    'open_time', 'open', 'high', 'low', 'close', 'volume',
+    'close_time', 'quote_asset_volume', 'number_of_trades',
+    'taker_buy_base', 'taker_buy_quote', 'ignore'
+]
+OHLC_COLUMNS = ['open', 'high', 'low', 'close']
+# Binance caps spot /api/v3/klines at 1000 rows per request
+PAGE_LIMIT = 1000
+# Kline JSON compresses ~8-10x, ask for it explicitly on every session
+COMPRESSION_HEADERS = {'Accept-Encoding': 'gzip, deflate'}
+
+# Reuse TCP/TLS connections across archive downloads
+_SESSION = requests.Session()
+_SESSION.headers.update(COMPRESSION_HEADERS)
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.2)
+))
+
+def compute_windows(start_time, end_time, minutes_per_page=PAGE_LIMIT):
+    """Compute the endTime (ms) of every kline page between start_time and end_time"""
+    start_ms = int(start_time.timestamp() * 1000)
+    end_ms = int(end_time.timestamp() * 1000)
+    step_ms = minutes_per_page * 60 * 1000
+    # Oldest page first, so pages land in the buffer already in time order
+    return list(range(end_ms, start_ms, -step_ms))[::-1]
+
+async def fetch_page(session, semaphore, symbol, end_ms, limit=PAGE_LIMIT):
+    """Fetch a single page of 1m klines ending at end_ms"""
+    params = {
+        'symbol': symbol,
+        'interval': '1m',
+        'limit': limit,
+        'endTime': end_ms
+    }
+    async with semaphore:
+        async with session.get(KLINES_URL, params=params) as response:
+            response.raise_for_status()
+            return orjson.loads(await response.read())
+
+async def fetch_all_pages(symbol, windows, limit=PAGE_LIMIT):
+    """Fetch all kline pages concurrently over a single HTTP session"""
+    # Binance allows ~1200 requests/min, keep at most 8 in flight
+    semaphore = asyncio.Semaphore(8)
+    connector = aiohttp.TCPConnector(limit=16)
+    async with aiohttp.ClientSession(
+        connector=connector, headers=COMPRESSION_HEADERS, auto_decompress=True
+    ) as session:
+        return await asyncio.gather(
+            *[fetch_page(session, semaphore, symbol, end_ms, limit) for end_ms in windows],
+            return_exceptions=True
+        )
+
+def fetch_rest_klines(symbol, start_time, end_time):
+    """Fetch 1m klines between start_time and end_time from the Binance REST API"""
+    limit = PAGE_LIMIT
+    windows = compute_windows(start_time, end_time, minutes_per_page=limit)
+    pages = asyncio.run(fetch_all_pages(symbol, windows, limit))
+    
+    # Retry failed pages once, then give up rather than return (and cache) a frame with holes
+    failed = [i for i, data in enumerate(pages) if isinstance(data, Exception)]
+    if failed:
+        retried = asyncio.run(fetch_all_pages(symbol, [windows[i] for i in failed], limit))
+        for i, data in zip(failed, retried):
+            if isinstance(data, Exception):
+                raise RuntimeError(f"Error fetching {symbol} klines ending at {windows[i]}: {data}") from data
+            pages[i] = data
+    
+    # Parse pages straight into preallocated buffers, keeping only open_time and OHLC
+    times = np.empty(len(windows) * limit, dtype=np.int64)
+    ohlc = np.empty((len(windows) * limit, len(OHLC_COLUMNS)), dtype=np.float32)
+    filled = 0
+    for end_ms, data in zip(windows, pages):
+        # Windows are a fixed `limit` minutes apart, so once history has started every page
+        # must come back full or the minutes between it and the previous page are missing
+        if filled and len(data) < limit:
+            raise RuntimeError(
+                f"Short {symbol} klines page ending at {end_ms}: {len(data)} of {limit} rows"
+            )
+        if not data:
+            continue
+        
+        arr = np.asarray(data, dtype=object)
+        rows = len(arr)
+        times[filled:filled + rows] = arr[:, 0].astype(np.int64)
+        ohlc[filled:filled + rows] = arr[:, 1:5].astype(np.float32)
+        filled += rows
+    
+    # Localize once at ingest so the stats functions never have to copy the frame to do it
+    index = pd.DatetimeIndex(times[:filled].astype('datetime64[ms]'), name='timestamp').tz_localize(pytz.utc)
+    return pd.DataFrame(ohlc[:filled], index=index, columns=OHLC_COLUMNS)
+
+def download_monthly_archive(url):
+    """Download and parse one monthly kline archive, None if not published yet"""
+    response = _SESSION.get(url)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        with archive.open(archive.namelist()[0]) as csv_file:
+            df = pd.read_csv(
+                csv_file,
+                header=None,
+                names=KLINE_COLUMNS,
+                usecols=['open_time'] + OHLC_COLUMNS,
+                dtype={col: np.float32 for col in OHLC_COLUMNS},
+                engine='c'
+            )
+    
+    # Spot archives switched from millisecond to microsecond timestamps in 2025
+    unit = 'us' if df['open_time'].iloc[0] > 10**14 else 'ms'
+    df['timestamp'] = pd.to_datetime(df['open_time'], unit=unit, utc=True).astype('datetime64[ms, UTC]')
+    return df.set_index('timestamp')[OHLC_COLUMNS]
+
+def sort_and_dedupe(df, keep='first'):
+    """Drop repeated minutes, sorting only if the pages did not arrive in order"""
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index(kind='stable')
+    if len(df) < 2:
+        return df
+    
+    # On a sorted index duplicates are adjacent, so one comparison per row finds them
+    ts = df.index.asi8
+    changed = ts[1:] != ts[:-1]
+    if changed.all():
+        return df
+    mask = np.concatenate(([True], changed)) if keep == 'first' else np.concatenate((changed, [True]))
+    return df[mask]
+
+def bounded_map(executor, fn, items, window):
+    """Like executor.map, but with at most `window` calls submitted and not yet consumed"""
+    pending = deque()
+    for item in items:
+        if len(pending) == window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, item))
+    while pending:
+        yield pending.popleft().result()
+
+def fetch_bulk_klines(symbol, days):
+    """Fetch 1m klines from monthly archives, topping up the current month via REST"""
+    end_time = datetime.now(pytz.utc)
+    start_time = end_time - timedelta(days=days)
+    
+    # Only complete months are published as archives
+    months = pd.period_range(start_time.replace(tzinfo=None), end_time.replace(tzinfo=None), freq='M')[:-1]
+    urls = [ARCHIVE_URL.format(symbol=symbol, year=m.year, month=m.month) for m in months]
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Stream each month to disk as it arrives instead of holding every frame for a concat
+        tmp_path = os.path.join(tmp_dir, f"{symbol}_bulk.parquet")
+        writer = None
+        rest_start = start_time
+        contiguous = True
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            # A slow early month must not let every later month pile up in memory behind it
+            for month, frame in zip(months, bounded_map(executor, download_monthly_archive, urls, 8)):
+                if frame is None:
+                    # Everything after the last contiguous archived month comes from REST
+                    contiguous = False
+                    continue
+                table = pa.Table.from_pandas(frame)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+                if contiguous:
+                    rest_start = max(rest_start, month.end_time.ceil('min').tz_localize(pytz.utc))
+        
+        # The first REST page reaches back before rest_start, drop the overlap with the archives
+        rest_df = fetch_rest_klines(symbol, rest_start, end_time)
+        rest_df = rest_df[rest_df.index >= rest_start]
+        if writer is None:
+            full_df = rest_df
+        else:
+            writer.write_table(pa.Table.from_pandas(rest_df, schema=writer.schema))
+            writer.close()
+            # Read back as one contiguous table, freeing Arrow buffers as pandas takes them over
+            full_df = pq.read_table(tmp_path).to_pandas(split_blocks=True, self_destruct=True)
+    
+    if full_df.empty:
+        raise ValueError("No data fetched from Binance API")
+    
+    full_df = full_df[full_df.index >= start_time]
+    return sort_and_dedupe(full_df)
+
+def fetch_klines(symbol, days):
+    """Fetch the last `days` of 1m klines, using archives for long ranges"""
+    if days > 7:
+        return fetch_bulk_klines(symbol, days)
+    
+    end_time = datetime.now(pytz.utc)
+    start_time = end_time - timedelta(days=days)
+    full_df = fetch_rest_klines(symbol, start_time, end_time)
+    if full_df.empty:
+        raise ValueError("No data fetched from Binance API")
+    
+    return sort_and_dedupe(full_df)
+
+def load_or_fetch(symbol, days, cache_dir='~/.cache/binance'):
+    """Load 1m klines from the local Parquet cache, fetching only what is missing"""
+    cache_dir = os.path.expanduser(cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{symbol}_1m.parquet")
+    
+    end_time = datetime.now(pytz.utc)
+    start_time = end_time - timedelta(days=days)
+    
+    with open(path + '.lock', 'w') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        
+        cached = pd.read_parquet(path) if os.path.exists(path) else None
+        if cached is not None and cached.index.tz is None:
+            # Caches written before klines were UTC-aware
+            cached = cached.tz_localize(pytz.utc)
+        if cached is not None:
+            # Keep OHLC float32 end-to-end even if the file was written by other tooling
+            cached = cached.astype({col: np.float32 for col in OHLC_COLUMNS})
+        
+        if cached is None or cached.empty or cached.index[0] > start_time + timedelta(minutes=1):
+            # Nothing usable on disk, fetch the whole range
+            full_df = fetch_klines(symbol, days)
+            if cached is not None:
+                full_df = pd.concat([cached, full_df])
+        else:
+            # Refetch from the last cached kline on, it may have been cached as a still-open candle
+            missing = end_time - cached.index[-1]
+            delta_df = fetch_klines(symbol, missing.total_seconds() / 86400)
+            full_df = pd.concat([cached, delta_df[delta_df.index >= cached.index[-1]]])
+        
+        full_df = sort_and_dedupe(full_df, keep='last')
+        
+        tmp_path = path + '.tmp'
+        full_df.to_parquet(tmp_path, engine='pyarrow', compression='zstd')
+        os.replace(tmp_path, path)
+    
+    return full_df[full_df.index >= start_time]
+
+def fetch_minute_data(symbol, days=30):
+    """Fetch minute-level kline data for symbol from Binance API"""
+    return load_or_fetch(symbol, days)
@@ -1,116 +1,56 @@
+import argparse
+import numpy as np
 import pandas as pd
-import requests
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import timedelta
 import pytz
 from plotly.subplots import make_subplots
 
-def fetch_minute_data(days=30):
-    """Fetch minute-level BTC data from Binance API"""
-    interval = '1m'
-    limit = 1440
-    url = "https://api.binance.com/api/v3/klines"
-    
-    end_time = datetime.now(pytz.utc)
-    start_time = end_time - timedelta(days=days)
-    start_time = start_time.replace(tzinfo=pytz.utc)
-    
-    all_data = []
-    current_end = end_time
-    
-    while current_end > start_time:
-        params = {
-            'symbol': 'BTCUSDT',
-            'interval': interval,
-            'limit': limit,
-            'endTime': int(current_end.timestamp() * 1000)
-        }
-        try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            if not data:
-                break
-                
-            df = pd.DataFrame(data, columns=[
-                'open_time', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_asset_volume', 'number_of_trades',
-                'taker_buy_base', 'taker_buy_quote', 'ignore'
-            ])
-            
-            df['timestamp'] = pd.to_datetime(df['open_time'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-            for col in ['open', 'high', 'low', 'close']:
-                df[col] = df[col].astype(float)
-            
-            all_data.append(df)
-            current_end = df.index[0].to_pydatetime().replace(tzinfo=pytz.utc) - timedelta(minutes=1)
-            
-        except Exception as e:
-            print(f"Error fetching data: {e}")
-            break
-    
-    if not all_data:
-        raise ValueError("No data fetched from Binance API")
-    
-    full_df = pd.concat(all_data).sort_index()
-    return full_df[~full_df.index.duplicated(keep='first')]
+from binance_fetch import fetch_minute_data
+from sessions import aggregate
+
+# Session opens at 06:30 UTC and runs 5h30m (to 12:00 UTC)
+_SESSION_OPEN = timedelta(hours=6, minutes=30)  # offset from midnight
+_SESSION_DURATION = timedelta(hours=5, minutes=30)
 
 def calculate_precise_session_stats(df):
     """Calculate statistics with precise time windows"""
-    results = []
-    
     if df.index.tz is None:
         df = df.tz_localize(pytz.utc)
     elif str(df.index.tz) != 'UTC':
         df = df.tz_convert(pytz.utc)
     
-    unique_dates = pd.to_datetime(df.index.date).unique()
-    
-    for date in unique_dates:
-        open_time = datetime.combine(date, datetime.strptime("06:30", "%H:%M").time()).replace(tzinfo=pytz.utc)
-        close_time = open_time + timedelta(hours=5, minutes=30)
-        
-        session_data = df[(df.index >= open_time) & (df.index <= close_time)]
-        
-        if len(session_data) > 10:
-            open_price = session_data.iloc[0]['close']
-            high_price = session_data['high'].max()
-            low_price = session_data['low'].min()
-            close_price = session_data.iloc[-1]['close']
-            
-            # Calculate both upward and downward volatility
-            upward_vol = ((high_price - open_price) / open_price) * 100
-            downward_vol = ((open_price - low_price) / open_price) * 100
-            
-            # True volatility is the maximum deviation from open
-            true_volatility = max(upward_vol, downward_vol)
-            direction = "up" if upward_vol > downward_vol else "down"
-            
-            # Get day of week
-            day_of_week = date.strftime('%A')
-            
-            results.append({
-                'date': date.date(),
-                'date_str': date.strftime('%Y-%m-%d'),
-                'day_of_week': day_of_week,
-                'open_time': open_time,
-                'close_time': close_time,
-                'open': open_price,
-                'high': high_price,
-                'low': low_price,
-                'close': close_price,
-                'true_volatility_pct': true_volatility,
-                'direction': direction,
-                'upward_vol_pct': upward_vol,
-                'downward_vol_pct': downward_vol,
-                'net_change_pct': ((close_price - open_price) / open_price) * 100,
-                'range_abs': high_price - low_price,
-                'data_points': len(session_data)
-            })
-    
-    return pd.DataFrame(results).sort_values('date')
+    sessions = aggregate(df, _SESSION_OPEN, _SESSION_DURATION)
+    sessions = sessions[sessions['data_points'] > 10]
+    
+    open_price = sessions['open'].to_numpy()
+    close_price = sessions['close'].to_numpy()
+    high_price = sessions['high'].to_numpy()
+    low_price = sessions['low'].to_numpy()
+    
+    # Calculate both upward and downward volatility
+    upward_vol = ((high_price - open_price) / open_price) * 100
+    downward_vol = ((open_price - low_price) / open_price) * 100
+    
+    return pd.DataFrame({
+        'date': sessions.index.date,
+        'date_str': sessions.index.strftime('%Y-%m-%d'),
+        'day_of_week': sessions.index.strftime('%A'),
+        'open_time': sessions.index + _SESSION_OPEN,
+        'close_time': sessions.index + _SESSION_OPEN + _SESSION_DURATION,
+        'open': open_price,
+        'high': high_price,
+        'low': low_price,
+        'close': close_price,
+        # True volatility is the maximum deviation from open
+        'true_volatility_pct': np.maximum(upward_vol, downward_vol),
+        'direction': np.where(upward_vol > downward_vol, 'up', 'down'),
+        'upward_vol_pct': upward_vol,
+        'downward_vol_pct': downward_vol,
+        'net_change_pct': ((close_price - open_price) / open_price) * 100,
+        'range_abs': high_price - low_price,
+        'data_points': sessions['data_points'].to_numpy()
+    })
 
 def create_interactive_plot(results_df, min_volatility=None):
     """Create interactive plot with Plotly"""
@@ -125,11 +65,18 @@ def create_interactive_plot(results_df, min_volatility=None):
     fig = make_subplots(specs=[[{"secondary_y": True}]])
     
     # Add day of week to hover text
-    results_df['hover_text'] = results_df.apply(
-        lambda row: f"{row['date_str']} ({row['day_of_week']})", axis=1)
+    results_df['hover_text'] = results_df['date_str'] + ' (' + results_df['day_of_week'] + ')'
+    
+    # Build hover data as one array: direction as text, prices and moves as float32
+    customdata = np.empty((len(results_df), 8), dtype=object)
+    customdata[:, 0] = results_df['direction'].to_numpy()
+    customdata[:, 1:] = results_df[[
+        'open', 'high', 'low', 'close',
+        'upward_vol_pct', 'downward_vol_pct', 'net_change_pct'
+    ]].to_numpy(dtype=np.float32)
     
     # Add volatility bars with color based on direction
-    colors = ['green' if x == 'up' else 'red' for x in results_df['direction']]
+    colors = np.where(results_df['direction'].to_numpy() == 'up', 'green', 'red')
     fig.add_trace(
         go.Bar(
             x=results_df['hover_text'],
@@ -149,17 +96,15 @@ def create_interactive_plot(results_df, min_volatility=None):
                 "<b>Down Move:</b> %{customdata[6]:.2f}%<br>"
                 "<b>Net Change:</b> %{customdata[7]:.2f}%"
             ),
-            customdata=results_df[[
-                'direction', 'open', 'high', 'low', 'close', 
-                'upward_vol_pct', 'downward_vol_pct', 'net_change_pct'
-            ]],
+            customdata=customdata,
         ),
         secondary_y=False,
     )
     
-    # Add net change line
+    # Add net change line, WebGL-rendered once SVG gets sluggish
+    scatter = go.Scattergl if len(results_df) > 500 else go.Scatter
     fig.add_trace(
-        go.Scatter(
+        scatter(
             x=results_df['hover_text'],
             y=results_df['net_change_pct'],
             name='Net Change %',
@@ -204,11 +149,21 @@ def create_interactive_plot(results_df, min_volatility=None):
     
     return fig
 
+def parse_args():
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="BTC 6:30AM-12PM UTC session volatility")
+    parser.add_argument('--days', type=int, default=30, help="Number of days to analyze (e.g., 30, 90, 365)")
+    parser.add_argument('--min-vol', type=float, default=0.0, help="Minimum volatility percentage to plot (0 shows all)")
+    parser.add_argument('--save-csv', action='store_true', help="Save the results to CSV")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    days = args.days
+    
     print("Fetching minute-level BTC data...")
     try:
-        days = int(input("Enter number of days to analyze (e.g., 30, 90, 365): "))
-        btc_data = fetch_minute_data(days=days)
+        btc_data = fetch_minute_data('BTCUSDT', days=days)
         print(f"Fetched data from {btc_data.index[0]} to {btc_data.index[-1]}")
     except Exception as e:
         print(f"Error fetching data: {e}")
@@ -230,17 +185,12 @@ def main():
     print("\n=== Day of Week Distribution ===")
     print(results['day_of_week'].value_counts().sort_index())
     
-    try:
-        min_volatility = float(input("\nEnter minimum volatility percentage to filter (or press Enter to show all): ") or 0)
-    except ValueError:
-        min_volatility = 0
-    
+    min_volatility = args.min_vol
     fig = create_interactive_plot(results, min_volatility if min_volatility > 0 else None)
     if fig:
         fig.show()
     
-    save_csv = input("\nDo you want to save the results to CSV? (y/n): ").lower()
-    if save_csv == 'y':
+    if args.save_csv:
         filename = f"btc_true_volatility_{days}days.csv"
         results.to_csv(filename, index=False)
         print(f"Results saved to {filename}")
@@ -1,113 +1,56 @@
+import argparse
+import numpy as np
 import pandas as pd
-import requests
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import timedelta
 import pytz
 from plotly.subplots import make_subplots
 
-def fetch_minute_data(days=30):
-    """Fetch minute-level BTC data from Binance API"""
-    interval = '1m'
-    limit = 1440
-    url = "https://api.binance.com/api/v3/klines"
-    
-    end_time = datetime.now(pytz.utc)
-    start_time = end_time - timedelta(days=days)
-    start_time = start_time.replace(tzinfo=pytz.utc)
-    
-    all_data = []
-    current_end = end_time
-    
-    while current_end > start_time:
-        params = {
-            'symbol': 'BTCUSDT',
-            'interval': interval,
-            'limit': limit,
-            'endTime': int(current_end.timestamp() * 1000)
-        }
-        try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            if not data:
-                break
-                
-            df = pd.DataFrame(data, columns=[
-                'open_time', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_asset_volume', 'number_of_trades',
-                'taker_buy_base', 'taker_buy_quote', 'ignore'
-            ])
-            
-            df['timestamp'] = pd.to_datetime(df['open_time'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-            for col in ['open', 'high', 'low', 'close']:
-                df[col] = df[col].astype(float)
-            
-            all_data.append(df)
-            current_end = df.index[0].to_pydatetime().replace(tzinfo=pytz.utc) - timedelta(minutes=1)
-            
-        except Exception as e:
-            print(f"Error fetching data: {e}")
-            break
-    
-    if not all_data:
-        raise ValueError("No data fetched from Binance API")
-    
-    full_df = pd.concat(all_data).sort_index()
-    return full_df[~full_df.index.duplicated(keep='first')]
+from binance_fetch import fetch_minute_data
+from sessions import aggregate
+
+# Session opens at 18:30 UTC and runs 17h30m (to 12:00 UTC next day)
+_SESSION_OPEN = timedelta(hours=18, minutes=30)  # offset from midnight
+_SESSION_DURATION = timedelta(hours=17, minutes=30)
 
 def calculate_precise_session_stats(df):
     """Calculate statistics with precise time windows"""
-    results = []
-    
     if df.index.tz is None:
         df = df.tz_localize(pytz.utc)
     elif str(df.index.tz) != 'UTC':
         df = df.tz_convert(pytz.utc)
     
-    unique_dates = pd.to_datetime(df.index.date).unique()
-    
-    for date in unique_dates:
-        open_time = datetime.combine(date, datetime.strptime("18:30", "%H:%M").time()).replace(tzinfo=pytz.utc)
-        close_time = open_time + timedelta(hours=17, minutes=30)
-        
-        session_mask = (df.index >= open_time) & (df.index <= close_time)
-        session_data = df[session_mask]
-        
-        if len(session_data) > 10:
-            open_price = session_data.iloc[0]['close']
-            close_price = session_data.iloc[-1]['close']
-            high_price = session_data['high'].max()
-            low_price = session_data['low'].min()
-            
-            pct_change = ((close_price - open_price) / open_price) * 100
-            volatility_pct = ((high_price - low_price) / open_price) * 100
-            max_gain_pct = ((high_price - open_price) / open_price) * 100
-            max_loss_pct = ((low_price - open_price) / open_price) * 100
-            
-            # Calculate direction for coloring
-            direction = "up" if close_price > open_price else "down"
-            
-            results.append({
-                'date': date.date(),
-                'date_str': date.strftime('%Y-%m-%d'),
-                'open_time': open_time,
-                'close_time': close_time,
-                'open': open_price,
-                'close': close_price,
-                'high': high_price,
-                'low': low_price,
-                'pct_change': pct_change,
-                'volatility_pct': volatility_pct,
-                'max_gain_pct': max_gain_pct,
-                'max_loss_pct': max_loss_pct,
-                'range_abs': high_price - low_price,
-                'data_points': len(session_data),
-                'direction': direction
-            })
-    
-    return pd.DataFrame(results).sort_values('date')
+    sessions = aggregate(df, _SESSION_OPEN, _SESSION_DURATION)
+    sessions = sessions[sessions['data_points'] > 10]
+    
+    open_price = sessions['open'].to_numpy()
+    close_price = sessions['close'].to_numpy()
+    high_price = sessions['high'].to_numpy()
+    low_price = sessions['low'].to_numpy()
+    
+    pct_change = ((close_price - open_price) / open_price) * 100
+    volatility_pct = ((high_price - low_price) / open_price) * 100
+    max_gain_pct = ((high_price - open_price) / open_price) * 100
+    max_loss_pct = ((low_price - open_price) / open_price) * 100
+    
+    return pd.DataFrame({
+        'date': sessions.index.date,
+        'date_str': sessions.index.strftime('%Y-%m-%d'),
+        'open_time': sessions.index + _SESSION_OPEN,
+        'close_time': sessions.index + _SESSION_OPEN + _SESSION_DURATION,
+        'open': open_price,
+        'close': close_price,
+        'high': high_price,
+        'low': low_price,
+        'pct_change': pct_change,
+        'volatility_pct': volatility_pct,
+        'max_gain_pct': max_gain_pct,
+        'max_loss_pct': max_loss_pct,
+        'range_abs': high_price - low_price,
+        'data_points': sessions['data_points'].to_numpy(),
+        # Calculate direction for coloring
+        'direction': np.where(close_price > open_price, 'up', 'down')
+    })
 
 def create_interactive_plot(results_df):
     """Create interactive plot with Plotly"""
@@ -115,7 +58,7 @@ def create_interactive_plot(results_df):
     fig = make_subplots(specs=[[{"secondary_y": True}]])
     
     # Add volatility bars with color based on direction
-    colors = ['green' if x == 'up' else 'red' for x in results_df['direction']]
+    colors = np.where(results_df['direction'].to_numpy() == 'up', 'green', 'red')
     fig.add_trace(
         go.Bar(
             x=results_df['date_str'],
@@ -132,14 +75,15 @@ def create_interactive_plot(results_df):
                 "<b>Low:</b> $%{customdata[3]:.2f}<br>"
                 "<b>Change:</b> %{customdata[4]:.2f}%"
             ),
-            customdata=results_df[['open', 'close', 'high', 'low', 'pct_change']],
+            customdata=results_df[['open', 'close', 'high', 'low', 'pct_change']].to_numpy(dtype=np.float32),
         ),
         secondary_y=False,
     )
     
-    # Add price change line
+    # Add price change line, WebGL-rendered once SVG gets sluggish
+    scatter = go.Scattergl if len(results_df) > 500 else go.Scatter
     fig.add_trace(
-        go.Scatter(
+        scatter(
             x=results_df['date_str'],
             y=results_df['pct_change'],
             name='Price Change %',
@@ -180,11 +124,18 @@ def create_interactive_plot(results_df):
     
     return fig
 
+def parse_args():
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="BTC 6:30PM-12PM UTC session volatility")
+    parser.add_argument('--days', type=int, default=365, help="Number of days to analyze")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    
     print("Fetching minute-level BTC data...")
     try:
-        # Start with 30 days for testing, can increase to 365 after verifying
-        btc_data = fetch_minute_data(days=365)
+        btc_data = fetch_minute_data('BTCUSDT', days=args.days)
         print(f"Fetched data from {btc_data.index[0]} to {btc_data.index[-1]}")
     except Exception as e:
         print(f"Error fetching data: {e}")
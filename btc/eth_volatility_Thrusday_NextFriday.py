@@ -1,122 +1,60 @@
+import argparse
+import numpy as np
 import pandas as pd
-import requests
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import timedelta
 import pytz
 from plotly.subplots import make_subplots
 
-def fetch_minute_data(days=30):
-    """Fetch minute-level ETH data from Binance API"""
-    interval = '1m'
-    limit = 1440
-    url = "https://api.binance.com/api/v3/klines"
-    
-    end_time = datetime.now(pytz.utc)
-    start_time = end_time - timedelta(days=days)
-    start_time = start_time.replace(tzinfo=pytz.utc)
-    
-    all_data = []
-    current_end = end_time
-    
-    while current_end > start_time:
-        params = {
-            'symbol': 'ETHUSDT',  # Changed from BTCUSDT to ETHUSDT
-            'interval': interval,
-            'limit': limit,
-            'endTime': int(current_end.timestamp() * 1000)
-        }
-        try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            if not data:
-                break
-                
-            df = pd.DataFrame(data, columns=[
-                'open_time', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_asset_volume', 'number_of_trades',
-                'taker_buy_base', 'taker_buy_quote', 'ignore'
-            ])
-            
-            df['timestamp'] = pd.to_datetime(df['open_time'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-            for col in ['open', 'high', 'low', 'close']:
-                df[col] = df[col].astype(float)
-            
-            all_data.append(df)
-            current_end = df.index[0].to_pydatetime().replace(tzinfo=pytz.utc) - timedelta(minutes=1)
-            
-        except Exception as e:
-            print(f"Error fetching data: {e}")
-            break
-    
-    if not all_data:
-        raise ValueError("No data fetched from Binance API")
-    
-    full_df = pd.concat(all_data).sort_index()
-    return full_df[~full_df.index.duplicated(keep='first')]
+from binance_fetch import fetch_minute_data
+from sessions import aggregate_weekly
 
 def calculate_weekly_volatility(df):
     """Calculate weekly volatility from Thursday 12PM to next Friday 12PM"""
-    results = []
-    
     if df.index.tz is None:
         df = df.tz_localize(pytz.utc)
     elif str(df.index.tz) != 'UTC':
         df = df.tz_convert(pytz.utc)
     
-    # Find all Thursdays in the data
-    thursdays = df[df.index.dayofweek == 3]  # 3 is Thursday
-    
-    for thursday_date in thursdays.index.normalize().unique():
-        # Get Thursday 12PM UTC
-        thursday_start = thursday_date + timedelta(hours=12)
-        
-        # Get next Friday 12PM UTC (7 days later)
-        friday_end = thursday_start + timedelta(days=7)
-        
-        # Get data for this weekly period
-        weekly_data = df[(df.index >= thursday_start) & (df.index <= friday_end)]
-        
-        if len(weekly_data) > 10:
-            open_price = weekly_data.iloc[0]['close']
-            high_price = weekly_data['high'].max()
-            low_price = weekly_data['low'].min()
-            close_price = weekly_data.iloc[-1]['close']
-            
-            # Calculate both upward and downward volatility
-            upward_vol = ((high_price - open_price) / open_price) * 100
-            downward_vol = ((open_price - low_price) / open_price) * 100
-            
-            # True volatility is the maximum deviation from open
-            true_volatility = max(upward_vol, downward_vol)
-            direction = "up" if upward_vol > downward_vol else "down"
-            
-            # Get date range
-            start_date = weekly_data.index[0].date()
-            end_date = weekly_data.index[-1].date()
-            
-            results.append({
-                'start_date': start_date,
-                'end_date': end_date,
-                'date_range': f"{start_date} to {end_date}",
-                'open_time': thursday_start,
-                'close_time': friday_end,
-                'open': open_price,
-                'high': high_price,
-                'low': low_price,
-                'close': close_price,
-                'true_volatility_pct': true_volatility,
-                'direction': direction,
-                'upward_vol_pct': upward_vol,
-                'downward_vol_pct': downward_vol,
-                'net_change_pct': ((close_price - open_price) / open_price) * 100,
-                'range_abs': high_price - low_price,
-                'data_points': len(weekly_data)
-            })
-    
-    return pd.DataFrame(results).sort_values('start_date')
+    # Weekly periods run from Thursday 12PM UTC for 7 days, anchored on the first Thursday
+    weeks = aggregate_weekly(df, weekday=3, open_time=timedelta(hours=12))
+    if weeks.empty:
+        return pd.DataFrame()
+    
+    weeks = weeks[weeks['data_points'] > 10]
+    
+    open_price = weeks['open'].to_numpy()
+    high_price = weeks['high'].to_numpy()
+    low_price = weeks['low'].to_numpy()
+    close_price = weeks['close'].to_numpy()
+    
+    # Calculate both upward and downward volatility
+    upward_vol = ((high_price - open_price) / open_price) * 100
+    downward_vol = ((open_price - low_price) / open_price) * 100
+    
+    # Get date range
+    start_dates = weeks['first_minute'].dt.strftime('%Y-%m-%d')
+    end_dates = weeks['last_minute'].dt.strftime('%Y-%m-%d')
+    
+    return pd.DataFrame({
+        'start_date': weeks['first_minute'].dt.date.to_numpy(),
+        'end_date': weeks['last_minute'].dt.date.to_numpy(),
+        'date_range': (start_dates + ' to ' + end_dates).to_numpy(),
+        'open_time': weeks.index,
+        'close_time': weeks.index + timedelta(days=7),
+        'open': open_price,
+        'high': high_price,
+        'low': low_price,
+        'close': close_price,
+        # True volatility is the maximum deviation from open
+        'true_volatility_pct': np.maximum(upward_vol, downward_vol),
+        'direction': np.where(upward_vol > downward_vol, 'up', 'down'),
+        'upward_vol_pct': upward_vol,
+        'downward_vol_pct': downward_vol,
+        'net_change_pct': ((close_price - open_price) / open_price) * 100,
+        'range_abs': high_price - low_price,
+        'data_points': weeks['data_points'].to_numpy()
+    })
 
 def create_interactive_plot(results_df, min_volatility=None):
     """Create interactive plot with Plotly"""
@@ -133,8 +71,16 @@ def create_interactive_plot(results_df, min_volatility=None):
     # Add date range to hover text
     results_df['hover_text'] = results_df['date_range']
     
+    # Build hover data as one array: direction as text, prices and moves as float32
+    customdata = np.empty((len(results_df), 8), dtype=object)
+    customdata[:, 0] = results_df['direction'].to_numpy()
+    customdata[:, 1:] = results_df[[
+        'open', 'high', 'low', 'close',
+        'upward_vol_pct', 'downward_vol_pct', 'net_change_pct'
+    ]].to_numpy(dtype=np.float32)
+    
     # Add volatility bars with color based on direction
-    colors = ['green' if x == 'up' else 'red' for x in results_df['direction']]
+    colors = np.where(results_df['direction'].to_numpy() == 'up', 'green', 'red')
     fig.add_trace(
         go.Bar(
             x=results_df['hover_text'],
@@ -154,17 +100,15 @@ def create_interactive_plot(results_df, min_volatility=None):
                 "<b>Down Move:</b> %{customdata[6]:.2f}%<br>"
                 "<b>Net Change:</b> %{customdata[7]:.2f}%"
             ),
-            customdata=results_df[[
-                'direction', 'open', 'high', 'low', 'close', 
-                'upward_vol_pct', 'downward_vol_pct', 'net_change_pct'
-            ]],
+            customdata=customdata,
         ),
         secondary_y=False,
     )
     
-    # Add net change line
+    # Add net change line, WebGL-rendered once SVG gets sluggish
+    scatter = go.Scattergl if len(results_df) > 500 else go.Scatter
     fig.add_trace(
-        go.Scatter(
+        scatter(
             x=results_df['hover_text'],
             y=results_df['net_change_pct'],
             name='Net Change %',
@@ -209,13 +153,23 @@ def create_interactive_plot(results_df, min_volatility=None):
     
     return fig
 
+def parse_args():
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="ETH weekly volatility (Thursday 12PM to Friday 12PM UTC)")
+    parser.add_argument('--days', type=int, default=30, help="Number of days to analyze (minimum 7 recommended)")
+    parser.add_argument('--min-vol', type=float, default=0.0, help="Minimum volatility percentage to plot (0 shows all)")
+    parser.add_argument('--save-csv', action='store_true', help="Save the results to CSV")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    days = args.days
+    
     print("Fetching minute-level ETH data...")
     try:
-        days = int(input("Enter number of days to analyze (minimum 7 recommended): "))
         if days < 7:
             print("Warning: For weekly analysis, at least 7 days of data is recommended")
-        eth_data = fetch_minute_data(days=days)
+        eth_data = fetch_minute_data('ETHUSDT', days=days)
         print(f"Fetched data from {eth_data.index[0]} to {eth_data.index[-1]}")
     except Exception as e:
         print(f"Error fetching data: {e}")
@@ -233,17 +187,12 @@ def main():
     print(f"Maximum volatility week: {results['true_volatility_pct'].max():.2f}% from {results.loc[results['true_volatility_pct'].idxmax(), 'date_range']}")
     print(f"Minimum volatility week: {results['true_volatility_pct'].min():.2f}%")
     
-    try:
-        min_volatility = float(input("\nEnter minimum volatility percentage to filter (or press Enter to show all): ") or 0)
-    except ValueError:
-        min_volatility = 0
-    
+    min_volatility = args.min_vol
     fig = create_interactive_plot(results, min_volatility if min_volatility > 0 else None)
     if fig:
         fig.show()
     
-    save_csv = input("\nDo you want to save the results to CSV? (y/n): ").lower()
-    if save_csv == 'y':
+    if args.save_csv:
         filename = f"eth_weekly_volatility_{days}days.csv"
         results.to_csv(filename, index=False)
         print(f"Results saved to {filename}")
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional, sessions fall back to a pandas groupby
+    njit = None
+
+if njit is not None:
+    @njit(cache=True, fastmath=True, parallel=True)
+    def reduce_sessions(ts, highs, lows, closes, session_starts, session_ends):
+        """Reduce each [start, end] session to first/last close, high, low and row count"""
+        n = len(session_starts)
+        # Sessions with no minutes keep NaN rather than uninitialised memory
+        open_price = np.full(n, np.nan, dtype=closes.dtype)
+        close_price = np.full(n, np.nan, dtype=closes.dtype)
+        high_price = np.full(n, np.nan, dtype=highs.dtype)
+        low_price = np.full(n, np.nan, dtype=lows.dtype)
+        data_points = np.zeros(n, dtype=np.int64)
+        
+        for i in prange(n):
+            lo = np.searchsorted(ts, session_starts[i], side='left')
+            hi = np.searchsorted(ts, session_ends[i], side='right')
+            data_points[i] = hi - lo
+            if hi == lo:
+                continue
+            
+            open_price[i] = closes[lo]
+            close_price[i] = closes[hi - 1]
+            high = highs[lo]
+            low = lows[lo]
+            for j in range(lo + 1, hi):
+                if highs[j] > high:
+                    high = highs[j]
+                if lows[j] < low:
+                    low = lows[j]
+            high_price[i] = high
+            low_price[i] = low
+        
+        return open_price, close_price, high_price, low_price, data_points
+else:
+    reduce_sessions = None
+
+def aggregate(df, open_time, window):
+    """Aggregate OHLC for the session opening at open_time (offset from midnight) on every date in df"""
+    if reduce_sessions is not None:
+        session_days = df.index.floor('D').unique()
+        session_starts = session_days + open_time
+        
+        # The kernel works on int64 nanoseconds and raw OHLC arrays
+        ts = df.index.values.astype('datetime64[ns]').view(np.int64)
+        starts = session_starts.values.astype('datetime64[ns]').view(np.int64)
+        ends = (session_starts + window).values.astype('datetime64[ns]').view(np.int64)
+        
+        open_price, close_price, high_price, low_price, data_points = reduce_sessions(
+            ts, df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy(), starts, ends
+        )
+        sessions = pd.DataFrame({
+            'open': open_price,
+            'close': close_price,
+            'high': high_price,
+            'low': low_price,
+            'data_points': data_points
+        }, index=session_days)
+        # Like the groupby fallback, leave out dates whose window holds no minutes
+        return sessions[sessions['data_points'] > 0]
+    
+    # Label every minute with the date its session opened on, keeping only dates that have
+    # minutes of their own so the sessions match the numba path
+    shifted = df.index - open_time
+    session_id = shifted.floor('D')
+    mask = ((shifted - session_id) <= window) & session_id.isin(df.index.floor('D').unique())
+    
+    return df[mask].groupby(session_id[mask]).agg(
+        open=('close', 'first'),
+        close=('close', 'last'),
+        high=('high', 'max'),
+        low=('low', 'min'),
+        data_points=('close', 'size')
+    )
+
+def aggregate_weekly(df, weekday=3, open_time=timedelta(hours=12)):
+    """Aggregate OHLC for 7-day periods opening at open_time on the first `weekday` in df"""
+    # Find the first anchor weekday in the data (3 is Thursday)
+    anchors = df.index[df.index.dayofweek == weekday]
+    if anchors.empty:
+        return pd.DataFrame()
+    
+    first_start = anchors[0].normalize() + open_time
+    df = df[df.index >= first_start]
+    
+    week_number = (df.index - first_start) // timedelta(days=7)
+    weeks = df.assign(minute=df.index).groupby(week_number).agg(
+        first_minute=('minute', 'first'),
+        last_minute=('minute', 'last'),
+        open=('close', 'first'),
+        high=('high', 'max'),
+        low=('low', 'min'),
+        close=('close', 'last'),
+        data_points=('close', 'size')
+    )
+    
+    # Index each week by the time it opened, keeping only weeks whose anchor day has data
+    weeks.index = first_start + weeks.index * timedelta(days=7)
+    return weeks[weeks.index.normalize().isin(anchors.normalize())]
@@ -1,70 +1,94 @@
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
-from datetime import datetime
-from plotly.subplots import make_subplots
+from nifty_io import load_nifty_data
 
-def load_nifty_data(file_path):
-    """Load Nifty historical data from CSV"""
-    df = pd.read_csv(file_path)
-    
-    # Clean and convert data
-    df['Date'] = pd.to_datetime(df['Date'], format='%d-%m-%Y')
-    df.set_index('Date', inplace=True)
-    
-    # Convert string values to numeric
-    df['Price'] = df['Price'].str.replace(',', '').astype(float)
-    df['Open'] = df['Open'].str.replace(',', '').astype(float)
-    df['High'] = df['High'].str.replace(',', '').astype(float)
-    df['Low'] = df['Low'].str.replace(',', '').astype(float)
-    df['Change %'] = df['Change %'].str.replace('%', '').astype(float)
-    
-    return df.sort_index()
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional, daily stats fall back to the numpy expressions
+    njit = None
+
+# Special sessions fall on weekends too, so keep all seven days in weekday order
+_WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _vol_kernel(openp, high, low, close, out_true, out_dir, out_up, out_down, out_net):
+        """Compute every per-day volatility measure in a single pass over the OHLC arrays"""
+        for i in prange(len(openp)):
+            up = ((high[i] - openp[i]) / openp[i]) * 100
+            down = ((openp[i] - low[i]) / openp[i]) * 100
+            out_up[i] = up
+            out_down[i] = down
+            out_dir[i] = up > down
+            out_true[i] = up if up > down else down
+            out_net[i] = ((close[i] - openp[i]) / openp[i]) * 100
+else:
+    _vol_kernel = None
 
 def calculate_daily_stats(df):
     """Calculate daily volatility statistics"""
-    results = []
-    
-    for date, row in df.iterrows():
-        open_price = row['Open']
-        high_price = row['High']
-        low_price = row['Low']
-        close_price = row['Price']
-        
+    open_price = df['Open'].values
+    high_price = df['High'].values
+    low_price = df['Low'].values
+    close_price = df['Price'].values
+    
+    # Single fused pass when numba is available
+    if _vol_kernel is not None:
+        n = len(open_price)
+        true_volatility = np.empty(n, dtype=open_price.dtype)
+        is_up = np.empty(n, dtype=np.bool_)
+        upward_vol = np.empty(n, dtype=open_price.dtype)
+        downward_vol = np.empty(n, dtype=open_price.dtype)
+        net_change_pct = np.empty(n, dtype=open_price.dtype)
+        _vol_kernel(open_price, high_price, low_price, close_price,
+                    true_volatility, is_up, upward_vol, downward_vol, net_change_pct)
+    else:
         # Calculate both upward and downward volatility
         upward_vol = ((high_price - open_price) / open_price) * 100
         downward_vol = ((open_price - low_price) / open_price) * 100
         
-        # True volatility is the maximum deviation from open
-        true_volatility = max(upward_vol, downward_vol)
-        direction = "up" if upward_vol > downward_vol else "down"
+        # True volatility is the maximum deviation from open, one comparison gives it and the direction
+        is_up = upward_vol > downward_vol
+        true_volatility = np.where(is_up, upward_vol, downward_vol)
         
-        # Get day of week
-        day_of_week = date.strftime('%A')
-        
-        results.append({
-            'date': date.date(),
-            'date_str': date.strftime('%Y-%m-%d'),
-            'day_of_week': day_of_week,
-            'open': open_price,
-            'high': high_price,
-            'low': low_price,
-            'close': close_price,
-            'true_volatility_pct': true_volatility,
-            'direction': direction,
-            'upward_vol_pct': upward_vol,
-            'downward_vol_pct': downward_vol,
-            'net_change_pct': ((close_price - open_price) / open_price) * 100,
-            'range_abs': high_price - low_price,
-            'change_pct': row['Change %']
-        })
-    
-    return pd.DataFrame(results).sort_values('date')
+        net_change_pct = ((close_price - open_price) / open_price) * 100
+    
+    results = pd.DataFrame({
+        'date': df.index.date,
+        'date_str': np.datetime_as_string(df.index.values, unit='D'),
+        'day_of_week': pd.Categorical(df.index.day_name(), categories=_WEEKDAYS, ordered=True),
+        'open': open_price,
+        'high': high_price,
+        'low': low_price,
+        'close': close_price,
+        'true_volatility_pct': true_volatility,
+        'direction': pd.Categorical.from_codes(is_up.astype(np.int8), categories=['down', 'up']),
+        'upward_vol_pct': upward_vol,
+        'downward_vol_pct': downward_vol,
+        'net_change_pct': net_change_pct,
+        'range_abs': high_price - low_price,
+        'change_pct': df['Change %'].values
+    })
+    
+    return results
+
+def sort_by_volatility(results_df):
+    """Sort results by true volatility once so threshold filters can binary search it"""
+    return results_df.dropna(subset=['true_volatility_pct']).sort_values('true_volatility_pct', kind='stable')
 
-def create_interactive_plot(results_df, min_volatility=None):
+def create_interactive_plot(results_df, min_volatility=None, sorted_by_vol=None):
     """Create interactive plot with Plotly"""
+    # Imported here so computing the stats alone does not pay for loading plotly
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    
     # Filter by minimum volatility if specified
     if min_volatility is not None:
-        results_df = results_df[results_df['true_volatility_pct'] >= min_volatility]
+        if sorted_by_vol is None:
+            sorted_by_vol = sort_by_volatility(results_df)
+        # Binary search the threshold, then put only the selected days back in date order
+        cut = sorted_by_vol['true_volatility_pct'].searchsorted(min_volatility, side='left')
+        results_df = sorted_by_vol.iloc[cut:].sort_index()
         if results_df.empty:
             print(f"No days found with volatility >= {min_volatility}%")
             return None
@@ -73,14 +97,13 @@ def create_interactive_plot(results_df, min_volatility=None):
     fig = make_subplots(specs=[[{"secondary_y": True}]])
     
     # Add day of week to hover text
-    results_df['hover_text'] = results_df.apply(
-        lambda row: f"{row['date_str']} ({row['day_of_week']})", axis=1)
+    hover_text = (results_df['date_str'] + ' (' + results_df['day_of_week'].astype(str) + ')').to_numpy()
     
     # Add volatility bars with color based on direction
-    colors = ['green' if x == 'up' else 'red' for x in results_df['direction']]
+    colors = np.where(results_df['direction'].cat.codes == 1, 'green', 'red')
     fig.add_trace(
         go.Bar(
-            x=results_df['hover_text'],
+            x=hover_text,
             y=results_df['true_volatility_pct'],
             name='True Volatility %',
             marker_color=colors,
@@ -100,7 +123,7 @@ def create_interactive_plot(results_df, min_volatility=None):
             customdata=results_df[[
                 'direction', 'open', 'high', 'low', 'close', 
                 'upward_vol_pct', 'downward_vol_pct', 'net_change_pct'
-            ]],
+            ]].astype({'direction': str}).to_numpy(),
         ),
         secondary_y=False,
     )
@@ -108,7 +131,7 @@ def create_interactive_plot(results_df, min_volatility=None):
     # Add net change line
     fig.add_trace(
         go.Scatter(
-            x=results_df['hover_text'],
+            x=hover_text,
             y=results_df['net_change_pct'],
             name='Net Change %',
             mode='lines+markers',
@@ -143,7 +166,7 @@ def create_interactive_plot(results_df, min_volatility=None):
     if not results_df.empty:
         max_vol_idx = results_df['true_volatility_pct'].idxmax()
         fig.add_annotation(
-            x=results_df.loc[max_vol_idx, 'hover_text'],
+            x=hover_text[results_df.index.get_loc(max_vol_idx)],
             y=results_df.loc[max_vol_idx, 'true_volatility_pct'],
             text=f"Max: {results_df.loc[max_vol_idx, 'true_volatility_pct']:.2f}%",
             showarrow=True,
@@ -168,6 +191,9 @@ def main():
         print("No results calculated - check your data")
         return
     
+    # Sorted once so the volatility filter can binary search instead of masking
+    sorted_by_vol = sort_by_volatility(results)
+    
     print("\n=== Statistics Summary ===")
     print(f"Average max volatility: {results['true_volatility_pct'].mean():.2f}%")
     print(f"Maximum volatility day: {results['true_volatility_pct'].max():.2f}% on {results.loc[results['true_volatility_pct'].idxmax(), 'day_of_week']}")
@@ -182,7 +208,7 @@ def main():
     except ValueError:
         min_volatility = 0
     
-    fig = create_interactive_plot(results, min_volatility if min_volatility > 0 else None)
+    fig = create_interactive_plot(results, min_volatility if min_volatility > 0 else None, sorted_by_vol)
     if fig:
         fig.show()
     
@@ -1,93 +1,71 @@
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-from plotly.subplots import make_subplots
-
-def load_nifty_data(file_path):
-    """Load Nifty historical data from CSV"""
-    df = pd.read_csv(file_path)
-    
-    # Clean and convert data
-    df['Date'] = pd.to_datetime(df['Date'], format='%d-%m-%Y')
-    df.set_index('Date', inplace=True)
-    
-    # Convert string values to numeric
-    df['Price'] = df['Price'].str.replace(',', '').astype(float)
-    df['Open'] = df['Open'].str.replace(',', '').astype(float)
-    df['High'] = df['High'].str.replace(',', '').astype(float)
-    df['Low'] = df['Low'].str.replace(',', '').astype(float)
-    df['Change %'] = df['Change %'].str.replace('%', '').astype(float)
-    
-    return df.sort_index()
+from nifty_io import load_nifty_data
 
 def calculate_expiry_week_stats(df):
     """Calculate weekly expiry period statistics (Friday after expiry to next Thursday)"""
-    results = []
-    
-    # Find all Thursdays (expiry days) in the data
-    thursdays = df[df.index.weekday == 3].index
-    
-    for i in range(len(thursdays)-1):
-        expiry_date = thursdays[i]
-        next_expiry = thursdays[i+1]
-        
-        # Start on Friday after expiry
-        start_date = expiry_date + timedelta(days=1)
-        
-        # If Friday isn't a trading day, find the next trading day
-        while start_date not in df.index and start_date < next_expiry:
-            start_date += timedelta(days=1)
-            
-        # End on next expiry Thursday
-        end_date = next_expiry
-        
-        # Get all trading days in this period
-        period_data = df.loc[start_date:end_date]
-        
-        if len(period_data) < 3:  # Skip very short periods
-            continue
-            
-        start_open = period_data.iloc[0]['Open']
-        start_close = period_data.iloc[0]['Price']
-        end_close = period_data.iloc[-1]['Price']
-        period_high = period_data['High'].max()
-        period_low = period_data['Low'].min()
-        
-        # Calculate volatility measures
-        upward_vol = ((period_high - start_open) / start_open) * 100
-        downward_vol = ((start_open - period_low) / start_open) * 100
-        true_volatility = max(upward_vol, downward_vol)
-        direction = "up" if upward_vol > downward_vol else "down"
-        
-        # Calculate net change for the period
-        net_change_pct = ((end_close - start_open) / start_open) * 100
-        
-        # Calculate actual trading days (excluding holidays)
-        trading_days = len(period_data)
-        
-        results.append({
-            'expiry_date': expiry_date.date(),
-            'period_start': start_date.date(),
-            'period_end': end_date.date(),
-            'duration_days': (end_date - start_date).days,
-            'trading_days': trading_days,
-            'start_open': start_open,
-            'start_close': start_close,
-            'end_close': end_close,
-            'period_high': period_high,
-            'period_low': period_low,
-            'true_volatility_pct': true_volatility,
-            'direction': direction,
-            'upward_vol_pct': upward_vol,
-            'downward_vol_pct': downward_vol,
-            'net_change_pct': net_change_pct,
-            'range_abs': period_high - period_low
-        })
-    
-    return pd.DataFrame(results).sort_values('period_start')
+    # Label each trading day with the period it closes, period i running from the
+    # first trading day after expiry i up to and including expiry i+1
+    thursdays = pd.DatetimeIndex(df.index[df.index.weekday == 3])
+    period_id = thursdays.searchsorted(df.index, side='left') - 1
+    in_period = (period_id >= 0) & (period_id < len(thursdays) - 1)
+    period_data = df[in_period].assign(period_start=df.index[in_period])
+    periods = period_data.groupby(period_id[in_period]).agg(
+        period_start=('period_start', 'first'),
+        start_open=('Open', 'first'),
+        start_close=('Price', 'first'),
+        end_close=('Price', 'last'),
+        period_high=('High', 'max'),
+        period_low=('Low', 'min'),
+        trading_days=('Price', 'size')
+    )
+    periods = periods[periods['trading_days'] >= 3]  # Skip very short periods
+    
+    expiry_date = thursdays[periods.index.values]
+    end_date = thursdays[periods.index.values + 1]
+    start_date = pd.DatetimeIndex(periods['period_start'])
+    start_open = periods['start_open'].values
+    end_close = periods['end_close'].values
+    period_high = periods['period_high'].values
+    period_low = periods['period_low'].values
+    
+    # Calculate volatility measures
+    upward_vol = ((period_high - start_open) / start_open) * 100
+    downward_vol = ((start_open - period_low) / start_open) * 100
+    # One comparison picks both the direction and the larger move
+    is_up = upward_vol > downward_vol
+    true_volatility = np.where(is_up, upward_vol, downward_vol)
+    
+    # Calculate net change for the period
+    net_change_pct = ((end_close - start_open) / start_open) * 100
+    
+    results = pd.DataFrame({
+        'expiry_date': expiry_date.date,
+        'period_start': start_date.date,
+        'period_end': end_date.date,
+        'duration_days': (end_date - start_date).days.to_numpy(),
+        'trading_days': periods['trading_days'].values,
+        'start_open': start_open,
+        'start_close': periods['start_close'].values,
+        'end_close': end_close,
+        'period_high': period_high,
+        'period_low': period_low,
+        'true_volatility_pct': true_volatility,
+        'direction': pd.Categorical.from_codes(is_up.astype(np.int8), categories=['down', 'up']),
+        'upward_vol_pct': upward_vol,
+        'downward_vol_pct': downward_vol,
+        'net_change_pct': net_change_pct,
+        'range_abs': period_high - period_low
+    })
+    
+    return results
 
 def create_expiry_volatility_plot(results_df, min_volatility=None):
     """Create interactive plot for expiry period volatility"""
+    # Imported here so computing the stats alone does not pay for loading plotly
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    
     # Filter by minimum volatility if specified
     if min_volatility is not None:
         results_df = results_df[results_df['true_volatility_pct'] >= min_volatility]
@@ -99,14 +77,17 @@ def create_expiry_volatility_plot(results_df, min_volatility=None):
     fig = make_subplots(specs=[[{"secondary_y": True}]])
     
     # Create hover text with date range and expiry date
-    results_df['hover_text'] = results_df.apply(
-        lambda row: f"Exp {row['expiry_date']} | Period {row['period_start']} to {row['period_end']}", axis=1)
+    hover_text = (
+        'Exp ' + results_df['expiry_date'].astype(str)
+        + ' | Period ' + results_df['period_start'].astype(str)
+        + ' to ' + results_df['period_end'].astype(str)
+    ).to_numpy()
     
     # Add volatility bars with color based on direction
-    colors = ['green' if x == 'up' else 'red' for x in results_df['direction']]
+    colors = np.where(results_df['direction'].cat.codes == 1, 'green', 'red')
     fig.add_trace(
         go.Bar(
-            x=results_df['hover_text'],
+            x=hover_text,
             y=results_df['true_volatility_pct'],
             name='True Volatility %',
             marker_color=colors,
@@ -129,7 +110,9 @@ def create_expiry_volatility_plot(results_df, min_volatility=None):
                 'expiry_date', 'period_start', 'period_end', 'trading_days',
                 'direction', 'start_open', 'period_high', 'period_low', 'end_close',
                 'upward_vol_pct', 'downward_vol_pct', 'net_change_pct'
-            ]],
+            ]].astype({
+                'expiry_date': str, 'period_start': str, 'period_end': str, 'direction': str
+            }).to_numpy(),
         ),
         secondary_y=False,
     )
@@ -137,7 +120,7 @@ def create_expiry_volatility_plot(results_df, min_volatility=None):
     # Add net change line
     fig.add_trace(
         go.Scatter(
-            x=results_df['hover_text'],
+            x=hover_text,
             y=results_df['net_change_pct'],
             name='Net Change %',
             mode='lines+markers',
@@ -172,7 +155,7 @@ def create_expiry_volatility_plot(results_df, min_volatility=None):
     if not results_df.empty:
         max_vol_idx = results_df['true_volatility_pct'].idxmax()
         fig.add_annotation(
-            x=results_df.loc[max_vol_idx, 'hover_text'],
+            x=hover_text[results_df.index.get_loc(max_vol_idx)],
             y=results_df.loc[max_vol_idx, 'true_volatility_pct'],
             text=f"Max: {results_df.loc[max_vol_idx, 'true_volatility_pct']:.2f}%",
             showarrow=True,
@@ -0,0 +1,66 @@
+import os
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import csv as pa_csv
+except ImportError:  # fall back to the pandas C parser
+    pa_csv = None
+
+_PRICE_COLUMNS = ['Price', 'Open', 'High', 'Low']
+# Index levels and percentages fit float32's ~7 significant digits
+_FLOAT32_COLUMNS = {col: np.float32 for col in _PRICE_COLUMNS + ['Change %']}
+
+def _read_csv_arrow(file_path):
+    """Parse the CSV with pyarrow, stripping thousands separators in Arrow kernels"""
+    # The pyarrow engine of pd.read_csv has no thousands= option, so clean the columns here
+    table = pa_csv.read_csv(file_path, convert_options=pa_csv.ConvertOptions(
+        column_types={col: pa.string() for col in ['Date'] + _PRICE_COLUMNS},
+        strings_can_be_null=True
+    ))
+    table = table.set_column(
+        table.schema.get_field_index('Date'), 'Date',
+        pc.strptime(table['Date'], format='%d-%m-%Y', unit='us')
+    )
+    for col in _PRICE_COLUMNS:
+        table = table.set_column(
+            table.schema.get_field_index(col), col,
+            pc.cast(pc.replace_substring(table[col], ',', ''), pa.float64())
+        )
+    return table.to_pandas()
+
+@lru_cache(maxsize=4)
+def _load_nifty_data(file_path, mtime):
+    """Load Nifty historical data from CSV, via a Parquet sidecar when it is up to date"""
+    cache_path = file_path + '.parquet'
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) > mtime:
+        # Sidecars written before the downcast still hold float64
+        return pd.read_parquet(cache_path, engine='pyarrow').astype(_FLOAT32_COLUMNS)
+    
+    if pa_csv is not None:
+        df = _read_csv_arrow(file_path)
+    else:
+        # Let the parser handle the thousands separators and dates instead of string passes
+        df = pd.read_csv(
+            file_path,
+            thousands=',',
+            parse_dates=['Date'],
+            date_format='%d-%m-%Y',
+            dtype={col: float for col in _PRICE_COLUMNS}
+        )
+    df.set_index('Date', inplace=True)
+    
+    # Only the percent sign is left to strip
+    df['Change %'] = pd.to_numeric(df['Change %'].str.rstrip('%'), errors='coerce')
+    
+    df = df.astype(_FLOAT32_COLUMNS).sort_index()
+    df.to_parquet(cache_path, engine='pyarrow')
+    return df
+
+def load_nifty_data(file_path):
+    """Load Nifty historical data, reusing the parsed frame until the CSV changes"""
+    # Keyed on mtime so an edited CSV is reparsed, callers must not mutate the result
+    return _load_nifty_data(os.path.abspath(file_path), os.path.getmtime(file_path))